@@ -0,0 +1,44 @@
+import os
+import copy
+import yaml
+import pathlib
+from functools import lru_cache
+
+# Use the LibYAML bindings when available, they are much faster than the pure python parser
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+path_to_config = pathlib.Path(__file__).parent / "note_configs.yaml"
+
+
+@lru_cache(maxsize=128)
+def _load_yaml_cached(path: str, mtime: float, size: int) -> dict:
+    """Parse a yaml file. The modification time and size are part of the cache key
+    so that the file is parsed again when it changes.
+
+    Args:
+        path (str): Path to the yaml file.
+        mtime (float): Modification time of the file.
+        size (int): Size of the file in bytes.
+
+    Returns:
+        dict: Content of the yaml file.
+    """
+    with open(path, "r") as f:
+        return yaml.load(f, Loader=_YamlLoader)
+
+
+def load_config(path: os.PathLike = path_to_config) -> dict:
+    """Load the configuration file, parsing it only once as long as it is not modified.
+
+    Args:
+        path (os.PathLike, optional): Path to the configuration file. Defaults to `note_configs.yaml`.
+
+    Returns:
+        dict: A copy of the configuration, safe to modify.
+    """
+    path = os.path.realpath(path)
+    st = os.stat(path)
+    return copy.deepcopy(_load_yaml_cached(path, st.st_mtime, st.st_size))
@@ -1,18 +1,24 @@
 import os
 import re
 import yaml
-import copy
 import shutil
+import hashlib
 import logging
 import pathlib
 import platform
 import argparse
 import subprocess
 import pkg_resources
-from typing import Union, Tuple
+from typing import Union, Tuple, Optional
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
+from obsidian_pdf_gen.config import load_config
 from obsidian_pdf_gen.media_retriever.tools import (
     get_media_path,
     change_to_vault_directory,
+    media_index_generation,
+    invalidate_media_index,
 )
 
 
@@ -20,8 +26,397 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ObiPdfGen")
 
 path_to_config = pathlib.Path(__file__).parent / "../config/note_configs.yaml"
-with path_to_config.open("r") as f:
-    CONFIG = yaml.safe_load(f)
+CONFIG = load_config(path_to_config)
+
+
+@dataclass(frozen=True, slots=True)
+class _NoteCfg:
+    """Values of the configuration file used to generate the latex document."""
+
+    font_size: int
+    font_style: Optional[str]
+    inline_code_lang: str
+    hl_color: str
+    doc_class: str
+    force_doc_class: bool
+    indent: int
+    header_level: int
+    # Colors of the header levels 1 to 5
+    header_colors: Tuple[str, ...]
+    code_label: bool
+    code_frame_rule: str
+    code_font_family: str
+    supported_media: Tuple[str, ...]
+
+
+CFG = _NoteCfg(
+    font_size=CONFIG["font"]["size"],
+    font_style=CONFIG["font"].get("style", None),
+    inline_code_lang=CONFIG["inline code"]["default language"],
+    hl_color=CONFIG.get("highlight color", "yellow"),
+    doc_class=CONFIG["document class"].get("name"),
+    force_doc_class=CONFIG["document class"].get("force document class"),
+    indent=CONFIG["indent"],
+    header_level=CONFIG["Header"]["Level"],
+    header_colors=tuple(
+        CONFIG["Header"]["Colors"]["\\" + "#" * level] for level in range(1, 6)
+    ),
+    code_label=CONFIG["code"]["label"],
+    code_frame_rule=CONFIG["code"]["frame rule"],
+    code_font_family=CONFIG["code"]["font family"],
+    supported_media=tuple(CONFIG["supported media"]),
+)
+
+# Patterns used on every line of a note, compiled once.
+# Character classes are used instead of lazy wildcards where the closing
+# delimiter is a single character, so that a match never backtracks past it.
+_MATH_SPANS_RE = re.compile(r"\$\$.*?\$\$|\$[^$\n]*\$")
+_MATH_TOKEN_RE = re.compile(r"\x00M(\d+)\x00")
+_ITALIC_RE = re.compile(r"_([^_\n]*)_")
+_ESCAPED_ITALIC_RE = re.compile(r"\\_(.*?)\\_")
+_BOLD_RE = re.compile(r"\*\*(.*?)\*\*")
+_HL_RE = re.compile(r"==(.*?)==")
+_LINK_TXT_RE = re.compile(r"\[([^\]\n]*)\]\(([^)\n]*)\)")
+_INLINE_RE = re.compile(r"`(.+?)`")
+_LINK_NOTE_RE = re.compile(r"\[\[([^\]\n]*)\]\]")
+_CALLOUT_RE = re.compile(r"\[!([^\]\n]*)\]")
+_FOOTNOTE_RE = re.compile(r"\[\^(\d+)\]")
+_FOOTNOTE_DEF_RE = re.compile(r"\[\^(\d+)\]:")
+_RULE_RE = re.compile(r"---|\*\*\*")
+_HEADER_RE = re.compile(r"(#+) (.*)")
+# Whitespace delimited word with a single (escaped) leading hashtag
+_TAG_RE = re.compile(r"(?<!\S)\\#[^\s#]+(?!\S)")
+
+# Latex commands of the header levels
+_HEADER_CMDS = (
+    "\\section",
+    "\\subsection",
+    "\\subsubsection",
+    "\\noindent\\myparagraph",
+    "\\noindent\\mysubparagraph",
+)
+
+# Part of the preamble that does not depend on the options of the generator
+_PREAMBLE_STATIC = """\\usepackage{minted}
+\\usepackage{enumitem}
+\\setlistdepth{9}
+
+% Sets the level up to which the numbering will occur on the headers 
+\\setcounter{secnumdepth}{header_level}
+
+% Remove "chapter" from the chapter title
+\\usepackage{titlesec}
+\\titleformat{\\chapter}[display]{\\normalfont\\huge\\bfseries}{}{0pt}{\\Huge}
+\\titleformat{name=\\chapter,numberless}[display]
+  {\\normalfont\\huge\\bfseries}{}{0pt}{\\Huge}
+
+\\setlist[itemize,1]{label=\\textbullet}
+\\setlist[itemize,2]{label=\\textbullet}
+\\setlist[itemize,3]{label=\\textbullet}
+\\setlist[itemize,4]{label=\\textbullet}
+\\setlist[itemize,5]{label=\\textbullet}
+\\setlist[itemize,6]{label=\\textbullet}
+\\setlist[itemize,7]{label=\\textbullet}
+\\setlist[itemize,8]{label=\\textbullet}
+\\setlist[itemize,9]{label=\\textbullet}
+
+\\renewlist{itemize}{itemize}{9}
+
+\\usepackage{graphicx}
+
+\\usepackage{csquotes}
+
+\\usepackage[hidelinks]{hyperref}
+
+\\usepackage[T1]{fontenc}
+
+\\usepackage[most]{tcolorbox}
+\\definecolor{block-gray}{gray}{0.95}
+\\newtcolorbox{advtcolorbox}{
+    %colback=block-gray,
+    boxrule=0pt,
+    boxsep=0pt,
+    breakable,
+    enhanced jigsaw,
+    borderline west={4pt}{0pt}{gray},
+}
+
+% Remove paragraph indentation
+\\setlength{\\parindent}{0pt}
+
+\\newtcbox{\\pill}[1][blue]{on line,
+arc=7pt,colback=#1!10!white,colframe=#1!50!black,
+before upper={\\rule[-3pt]{0pt}{10pt}},boxrule=1pt,
+boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}
+
+\\usepackage{amsmath}
+\\usepackage[dvipsnames]{xcolor} % to access the named colour LightGray
+\\usepackage{soul}
+% \\usepackage{sectsty}
+\\definecolor{LightGray}{rgb}{0.9, 0.9, 0.9}
+\\definecolor{inlinecodecolor}{rgb}{0, 0.3, 0.6}
+\\usepackage{lmodern}
+
+\\makeatletter
+\\renewcommand\\subparagraph{%
+\\@startsection{subparagraph}{5}{0pt}%
+{3.25ex \\@plus 1ex \\@minus .2ex}{-1em}%
+{\\normalfont\\normalsize}}
+\\makeatother
+
+\\makeatletter
+\\renewcommand\\paragraph{%
+\\@startsection{paragraph}{4}{0pt}%
+{3.25ex \\@plus -1ex \\@minus .2ex}{-1em}%
+{\\normalfont\\normalsize\\bfseries}}
+\\makeatother
+"""
+# Add the level for headers to be numbered
+_PREAMBLE_STATIC = _PREAMBLE_STATIC.replace("header_level", str(CFG.header_level))
+
+
+def _paragraph_commands(h4_color: str, h5_color: str) -> str:
+    """Latex commands used for the level 4 and 5 headers.
+
+    Args:
+        h4_color (str): Color of the level 4 headers.
+        h5_color (str): Color of the level 5 headers.
+
+    Returns:
+        str: Definition of the commands.
+    """
+    return (
+        "\\newcommand{\\myparagraph}[1]{\\paragraph{\\textcolor{"
+        + h4_color
+        + "}{#1}}\\mbox{}\\\\}\n"
+        + "\\newcommand{\\mysubparagraph}[1]{\\subparagraph{\\textcolor{"
+        + h5_color
+        + "}{#1}}\\mbox{}\\\\}\n"
+    )
+
+
+_COLOR_HEADERS = (
+    "\\sectionfont{\\color{" + CFG.header_colors[0] + "}}\n"
+    + "\\subsectionfont{\\color{" + CFG.header_colors[1] + "}}\n"
+    + "\\subsubsectionfont{\\color{" + CFG.header_colors[2] + "}}\n"
+    + _paragraph_commands(CFG.header_colors[3], CFG.header_colors[4])
+)
+_BLACK_HEADERS = _paragraph_commands("black", "black")
+
+# Latex escapes of the special characters
+_ESCAPE_TABLE = str.maketrans({"&": "\\&", "%": "\\%", "#": "\\#", "_": "\\_"})
+_RULE_LATEX = "\\noindent\\rule[0.5ex]{\\linewidth}{1pt}"
+
+# latexmk runs pdflatex only as many times as needed (e.g. for the table of contents)
+_LATEXMK_INSTALLED = shutil.which("latexmk") is not None
+# Suffixes of the files created by `pdflatex` and `latexmk` next to the pdf
+_LATEX_AUX_SUFFIXES = (".aux", ".log", ".toc", ".out", ".pyg", ".fls", ".fdb_latexmk")
+_LATEX_OUTPUT_SUFFIXES = (".pdf", ".tex") + _LATEX_AUX_SUFFIXES
+
+# Latex code blocks, with and without a language
+_CODE_TEMPLATE_LANG = """
+\\begin{{minted}}[
+frame=lines,
+framesep=2mm,
+label=code_label,
+framerule=code_frame_rule,
+python3={python3},
+baselinestretch=1.2,
+breaklines=true,
+bgcolor=LightGray,
+fontsize=\\footnotesize,
+fontfamily=code_font_family,
+linenos
+]{{{language}}}
+{content}
+\\end{{minted}}
+            """
+_CODE_TEMPLATE_PLAIN = """
+\\begin{{minted}}[
+frame=lines,
+framesep=2mm,
+baselinestretch=1.2,
+framerule=code_frame_rule,
+fontfamily=code_font_family,
+breaklines=true,
+bgcolor=LightGray,
+fontsize=\\footnotesize,
+linenos
+]{{text}}
+{content}
+\\end{{minted}}
+            """
+# Add the code block settings
+_CODE_TEMPLATE_LANG, _CODE_TEMPLATE_PLAIN = (
+    template.replace("code_label", "{language}" if CFG.code_label else "none")
+    .replace("code_frame_rule", CFG.code_frame_rule)
+    .replace("code_font_family", CFG.code_font_family)
+    for template in (_CODE_TEMPLATE_LANG, _CODE_TEMPLATE_PLAIN)
+)
+
+
+def _sub_in_order(pattern: re.Pattern, line: str, originals: list, render) -> str:
+    """Replace each match of `pattern` in one pass, using the original (pre-escaping) content in order.
+
+    Args:
+        pattern (re.Pattern): Compiled pattern matching the escaped syntax.
+        line (str): Line where the special characters have already been escaped.
+        originals (list): Contents captured before escaping, in the same order as the matches.
+        render (Callable): Builds the latex code from an original content. Returning `None` keeps the match as is.
+
+    Returns:
+        str: Transformed line.
+    """
+    originals = iter(originals)
+
+    def _replace(match: re.Match) -> str:
+        original = next(originals, None)
+        if original is None:
+            return match.group(0)
+        replacement = render(original)
+        return match.group(0) if replacement is None else replacement
+
+    return pattern.sub(_replace, line)
+
+
+def _protect_math(line: str) -> Tuple[str, list]:
+    """Replace the math formulas of the line with placeholders so that they are not transformed.
+
+    Args:
+        line (str): Current line of the note.
+
+    Returns:
+        Tuple[str, list]: The line with placeholders and the math formulas they replace.
+    """
+    spans = []
+    if "$" not in line:
+        return line, spans
+
+    def _mask(match: re.Match) -> str:
+        spans.append(match.group(0))
+        return f"\x00M{len(spans) - 1}\x00"
+
+    return _MATH_SPANS_RE.sub(_mask, line), spans
+
+
+def _restore_math(line: str, spans: list) -> str:
+    """Put back the math formulas removed by `_protect_math`.
+
+    Args:
+        line (str): Transformed line with placeholders.
+        spans (list): Math formulas returned by `_protect_math`.
+
+    Returns:
+        str: Line with the original math formulas.
+    """
+    if not spans:
+        return line
+    return _MATH_TOKEN_RE.sub(lambda m: spans[int(m.group(1))], line)
+
+
+def _scan_blocks(lines: list) -> dict:
+    """Find where the math, code, quote, table and bullet point blocks of a note end,
+    in a single pass over the lines.
+
+    Args:
+        lines (list): Lines of the note.
+
+    Returns:
+        dict: For each line that can start a block, the kind of block ("math", "code", "quote", "table" or "list")
+            and the index of the last line of the block. Math and code blocks that are not closed are left out.
+    """
+    blocks = {}
+    next_math = None
+    next_fence = None
+    quote_end = None
+    table_end = None
+    list_end = None
+    # Going backward, the closing line of a block is known when reaching its start
+    for idx in range(len(lines) - 1, -1, -1):
+        line = lines[idx]
+        lstripped = line.lstrip()
+        if lstripped.startswith(">"):
+            if quote_end is None:
+                quote_end = idx
+            blocks[idx] = ("quote", quote_end)
+        else:
+            quote_end = None
+        if line.startswith("|"):
+            if table_end is None:
+                table_end = idx
+            blocks[idx] = ("table", table_end)
+        else:
+            table_end = None
+        # A line starting with --- becomes a horizontal rule, not a bullet point
+        if lstripped.startswith("-") and not lstripped.startswith("---"):
+            if list_end is None:
+                list_end = idx
+            blocks[idx] = ("list", list_end)
+        else:
+            list_end = None
+        if lstripped.startswith("$$") and next_math is not None:
+            blocks[idx] = ("math", next_math)
+        if "$$" in lstripped:
+            next_math = idx
+        if lstripped.startswith("```"):
+            if next_fence is not None:
+                blocks[idx] = ("code", next_fence)
+            next_fence = idx
+    return blocks
+
+
+def _scan_footnotes(lines: list) -> dict:
+    """Find the lines defining footnotes, in a single pass over the lines.
+
+    Args:
+        lines (list): Lines of the note.
+
+    Returns:
+        dict: Footnote number -> indices of the lines where the footnote is defined, in increasing order.
+    """
+    footnote_defs = {}
+    for idx, line in enumerate(lines):
+        if "[^" in line:
+            for footnote in _FOOTNOTE_DEF_RE.findall(line):
+                footnote_defs.setdefault(footnote, []).append(idx)
+    return footnote_defs
+
+
+# Converted notes, see `ObsiPdfGenerator._convert_note`
+_CONVERTED_NOTES = {}
+_CONVERTED_NOTES_SIZE = 128
+
+
+@lru_cache(maxsize=128)
+def _read_note_cached(path: str, mtime: float, size: int) -> tuple:
+    """Read the lines of a note. The modification time and size are part of the
+    cache key so that the note is read again when it changes.
+
+    Args:
+        path (str): Path to the note.
+        mtime (float): Modification time of the note.
+        size (int): Size of the note in bytes.
+
+    Returns:
+        tuple: Lines of the note, with their line endings.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return tuple(f.readlines())
+
+
+def _read_note_lines(path: str) -> tuple:
+    """Read the lines of a note, using the cached lines if the note did not change.
+
+    Args:
+        path (str): Path to the note.
+
+    Returns:
+        tuple: Lines of the note, with their line endings. The lines are shared between calls and must not be modified.
+    """
+    # The same relative path is another note after a change of directory
+    path = os.path.realpath(path)
+    st = os.stat(path)
+    return _read_note_cached(path, st.st_mtime, st.st_size)
 
 
 class ObsiPdfGenerator:
@@ -40,13 +435,15 @@ class ObsiPdfGenerator:
             include_toc (bool, optional): If `True` the Table of Content will be included in the pdf. Defaults to False.
             img_width (float, optional): Image width in inches. Defaults to 1.5.
         """
-        font_style = CONFIG["font"].get("style", None)
-        font_size = CONFIG["font"]["size"]
-        inline_code_lang = CONFIG["inline code"]["default language"]
-        hl_color = CONFIG.get("highlight color", "yellow")
-        document_class = CONFIG["document class"].get("name")
+        font_style = CFG.font_style
+        font_size = CFG.font_size
+        inline_code_lang = CFG.inline_code_lang
+        hl_color = CFG.hl_color
+        document_class = CFG.doc_class
         self.img_width = img_width
-        force_document_class = CONFIG["document class"].get("force document class")
+        # Latex code of the added notes, joined only when needed
+        self._note_parts = []
+        force_document_class = CFG.force_doc_class
         toc_latex = "\\tableofcontents\n" if include_toc else ""
 
         if not force_document_class:
@@ -60,158 +457,26 @@ class ObsiPdfGenerator:
             + str(font_size)
             + "pt"
             + "]"
-            + "{{"
+            + "{"
             + document_class
-            + "}}"
+            + "}"
             + "\n"
         )
-        self.document += """\\usepackage{{minted}}
-\\usepackage{{enumitem}}
-\\setlistdepth{{9}}
-
-% Sets the level up to which the numbering will occur on the headers 
-\\setcounter{{secnumdepth}}{{header_level}}
-
-% Remove "chapter" from the chapter title
-\\usepackage{{titlesec}}
-\\titleformat{{\\chapter}}[display]{{\\normalfont\\huge\\bfseries}}{{}}{{0pt}}{{\\Huge}}
-\\titleformat{{name=\\chapter,numberless}}[display]
-  {{\\normalfont\\huge\\bfseries}}{{}}{{0pt}}{{\\Huge}}
-
-\\setlist[itemize,1]{{label=\\textbullet}}
-\\setlist[itemize,2]{{label=\\textbullet}}
-\\setlist[itemize,3]{{label=\\textbullet}}
-\\setlist[itemize,4]{{label=\\textbullet}}
-\\setlist[itemize,5]{{label=\\textbullet}}
-\\setlist[itemize,6]{{label=\\textbullet}}
-\\setlist[itemize,7]{{label=\\textbullet}}
-\\setlist[itemize,8]{{label=\\textbullet}}
-\\setlist[itemize,9]{{label=\\textbullet}}
-
-\\renewlist{{itemize}}{{itemize}}{{9}}
-
-\\usepackage{{graphicx}}
-
-\\usepackage{{csquotes}}
-
-\\usepackage[hidelinks]{{hyperref}}
-
-\\usepackage[T1]{{fontenc}}
-
-\\usepackage[most]{{tcolorbox}}
-\\definecolor{{block-gray}}{{gray}}{{0.95}}
-\\newtcolorbox{{advtcolorbox}}{{
-    %colback=block-gray,
-    boxrule=0pt,
-    boxsep=0pt,
-    breakable,
-    enhanced jigsaw,
-    borderline west={{4pt}}{{0pt}}{{gray}},
-}}
-
-% Remove paragraph indentation
-\\setlength{{\\parindent}}{{0pt}}
-
-\\newtcbox{{\\pill}}[1][blue]{{on line,
-arc=7pt,colback=#1!10!white,colframe=#1!50!black,
-before upper={{\\rule[-3pt]{{0pt}}{{10pt}}}},boxrule=1pt,
-boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}}
-
-\\usepackage{{amsmath}}
-\\usepackage[dvipsnames]{{xcolor}} % to access the named colour LightGray
-\\usepackage{{soul}}
-% \\usepackage{{sectsty}}
-\\definecolor{{LightGray}}{{rgb}}{{0.9, 0.9, 0.9}}
-\\definecolor{{inlinecodecolor}}{{rgb}}{{0, 0.3, 0.6}}
-\\usepackage{{lmodern}}
-
-\\makeatletter
-\\renewcommand\\subparagraph{{%
-\\@startsection{{subparagraph}}{{5}}{{0pt}}%
-{{3.25ex \\@plus 1ex \\@minus .2ex}}{{-1em}}%
-{{\\normalfont\\normalsize}}}}
-\\makeatother
-
-\\makeatletter
-\\renewcommand\\paragraph{{%
-\\@startsection{{paragraph}}{{4}}{{0pt}}%
-{{3.25ex \\@plus -1ex \\@minus .2ex}}{{-1em}}%
-{{\\normalfont\\normalsize\\bfseries}}}}
-\\makeatother
-"""
-
-        # Add the level for headers to be numbered
-        self.document = self.document.replace("header_level", str(CONFIG["Header"]["Level"]))
-        self.document += "\\sethlcolor{{" + hl_color + "}}" + "\n"
+        self.document += _PREAMBLE_STATIC
+        self.document += "\\sethlcolor{" + hl_color + "}" + "\n"
         if font_style:
-            self.document += "\\usepackage{{" + font_style + "}}" + "\n"
+            self.document += "\\usepackage{" + font_style + "}" + "\n"
 
         self.document += (
-            "\\newrobustcmd*\\inlinecode[2][]{{"
-            + "\\textcolor{{inlinecodecolor}}{{\\mintinline[#1]{{"
+            "\\newrobustcmd*\\inlinecode[2][]{"
+            + "\\textcolor{inlinecodecolor}{\\mintinline[#1]{"
             + inline_code_lang
-            + "}}{{#2}}}}}}\n"
+            + "}{#2}}}\n"
         )
 
-        if colorfull_headers:
-            h1 = CONFIG["Header"]["Colors"]["\\#"]
-            h2 = CONFIG["Header"]["Colors"]["\\##"]
-            h3 = CONFIG["Header"]["Colors"]["\\###"]
-            h4 = CONFIG["Header"]["Colors"]["\\####"]
-            h5 = CONFIG["Header"]["Colors"]["\\#####"]
-            self.document += r"\sectionfont{{" + "\\color{{" + h1 + "}}" + "}}" + "\n"
-            self.document += (
-                r"\subsectionfont{{" + "\\color{{" + h2 + "}}" + "}}" + "\n"
-            )
-            self.document += (
-                r"\subsubsectionfont{{" + "\\color{{" + h3 + "}}" + "}}" + "\n"
-            )
-            self.document += (
-                "\\newcommand{{\\myparagraph}}[1]{{\\paragraph{{"
-                + "\\textcolor{{"
-                + h4
-                + "}}"
-                + "{{#1}}"
-                + "}}\\mbox{{}}\\\\}}"
-                + "\n"
-            )
-            self.document += (
-                "\\newcommand{{\\mysubparagraph}}[1]{{\\subparagraph{{"
-                + "\\textcolor{{"
-                + h5
-                + "}}"
-                + "{{#1}}"
-                + "}}\\mbox{{}}\\\\}}"
-                + "\n"
-            )
-        else:
-            black_color = "black"
-            # Level 4
-            self.document += (
-                "\\newcommand{{\\myparagraph}}[1]{{\\paragraph{{"
-                + "\\textcolor{{"
-                + black_color
-                + "}}"
-                + "{{#1}}"
-                + "}}\\mbox{{}}\\\\}}"
-                + "\n"
-            )
-            # Level 5
-            self.document += (
-                "\\newcommand{{\\mysubparagraph}}[1]{{\\subparagraph{{"
-                + "\\textcolor{{"
-                + black_color
-                + "}}"
-                + "{{#1}}"
-                + "}}\\mbox{{}}\\\\}}"
-                + "\n"
-            )
+        self.document += _COLOR_HEADERS if colorfull_headers else _BLACK_HEADERS
 
-        self.document += "\\begin{{document}}\n" + toc_latex + "\n"
-        self.document += """
-{}
-\\end{{document}}
-"""
+        self.document += "\\begin{document}\n" + toc_latex + "\n"
 
     def add_note(
         self,
@@ -235,10 +500,12 @@ boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}}
         if not note and note_paths:
             if isinstance(note_paths, str):
                 note_paths = [note_paths]
-                self.note_tex = ""
+                self._note_parts = []
+            # Queue of notes to add, linked notes are appended at the end
+            note_paths = deque(note_paths)
             # For each notes specified
             while len(note_paths) > 0:
-                note_path = note_paths.pop(0)
+                note_path = note_paths.popleft()
                 # Add the .md to the file name is it is not there
                 note_path = (
                     note_path if note_path.endswith(".md") else note_path + ".md"
@@ -246,17 +513,15 @@ boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}}
                 note_title = self.extract_note_title(note_path)
                 # Open the note file
                 try:
-                    with open(note_path, "r", encoding="utf-8") as f:
-                        lines = f.readlines()
+                    lines = _read_note_lines(note_path)
                 except FileNotFoundError:
                     logger.warning(
                         f"File '{note_path}' not found, trying to find it..."
                     )
                     # Let's try to find the file in current directory and subdirectories
-                    note_path_retrieved = get_media_path(note_path)
+                    note_path_retrieved = get_media_path(os.path.basename(note_path))
                     if note_path_retrieved:
-                        with open(note_path_retrieved, "r", encoding="utf-8") as f:
-                            lines = f.readlines()
+                        lines = _read_note_lines(note_path_retrieved)
                     else:
                         raise FileNotFoundError(
                             f"File '{note_path}' not found in current directory and subdirectories"
@@ -268,41 +533,14 @@ boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}}
                         "\\chapter{" + note_title + "}\\label{ch:" + note_title + "}\n"
                     )
                     tex.append(latex_chapter)
-                # Loop through every line
-                lines_to_skip = []
-                for ln, line in enumerate(lines):
-                    if ln in lines_to_skip:
-                        continue
-                    # Apply different changes to line
-                    (
-                        line,
-                        additional_lines_to_skip,
-                        additional_notes,
-                    ) = self._apply_transformation(line, ln, lines)
-                    logger.debug(f"Current line index = {ln}, line : {line}")
-                    # Update the lines to skip, if any
-                    lines_to_skip += additional_lines_to_skip
-                    logger.debug(f"lines_to_skip : {lines_to_skip}")
-                    tex.append(line)
-                    if include_linked_notes:
-                        if len(additional_notes) > 0:
-                            for graphic in additional_notes:
-                                if ".png" in graphic:
-                                    line = self._include_graphic(
-                                        graphic, self.img_width
-                                    )
-                                    # pop the last line to remve "[[my image.png]]" being present in doc
-                                    tex.pop(-1)
-                                    tex.append(line)
-                        # Add new notes to go through
-                        additional_md_notes = [
-                            a_note for a_note in additional_notes if ".md" in a_note
-                        ]
-                        note_paths.extend(additional_md_notes)
+                note_tex, linked_notes = self._convert_note(lines, include_linked_notes)
+                tex.extend(note_tex)
+                # Add new notes to go through
+                note_paths.extend(linked_notes)
 
             # Combine the lines
             note = "\n".join(tex)
-            self.note_tex += f"""{note}"""
+            self._note_parts.append(note)
 
         else:
             # Assume the title is the first line
@@ -313,11 +551,90 @@ boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}}
 {note}
 """
 
+    def _convert_note(
+        self, lines: tuple, include_linked_notes: bool = True
+    ) -> Tuple[tuple, tuple]:
+        """Convert the lines of a note to latex.
+        The result is kept for notes with the same content, as long as the media index
+        used to find the linked files is not built again and none of these files was deleted.
+
+        Args:
+            lines (tuple): Lines of the note.
+            include_linked_notes (bool, optional): Whether to look for the notes linked in the note. Defaults to True.
+
+        Returns:
+            Tuple[tuple, tuple]: The converted lines and the paths to the linked notes.
+        """
+        content_hash = hashlib.blake2b("".join(lines).encode(), digest_size=16).digest()
+        options = (include_linked_notes, self.img_width)
+        converted = _CONVERTED_NOTES.get(
+            (content_hash, options, media_index_generation())
+        )
+        if converted is not None:
+            note_tex, linked_notes, found_paths = converted
+            if all(os.path.exists(path) for path in found_paths):
+                return note_tex, linked_notes
+            # A file linked in the note was deleted, look for the linked files again
+            invalidate_media_index()
+        key = (content_hash, options, media_index_generation())
+
+        tex = []
+        linked_notes = []
+        # Paths of all the files linked in the note
+        found_paths = []
+        # Loop through every line
+        lines_to_skip = set()
+        blocks = _scan_blocks(lines)
+        footnote_defs = _scan_footnotes(lines)
+        for ln, line in enumerate(lines):
+            if ln in lines_to_skip:
+                continue
+            # Apply different changes to line
+            (
+                line,
+                additional_lines_to_skip,
+                additional_notes,
+            ) = self._apply_transformation(
+                line, line.lstrip(), ln, lines, blocks, footnote_defs
+            )
+            logger.debug(f"Current line index = {ln}, line : {line}")
+            # Update the lines to skip, if any
+            lines_to_skip.update(additional_lines_to_skip)
+            logger.debug(f"lines_to_skip : {lines_to_skip}")
+            found_paths.extend(additional_notes)
+            if include_linked_notes and len(additional_notes) > 0:
+                graphics = [
+                    graphic for graphic in additional_notes if ".png" in graphic
+                ]
+                if graphics:
+                    # The figure replaces the "[[my image.png]]" line
+                    line = self._include_graphic(graphics[-1], self.img_width)
+                linked_notes.extend(
+                    a_note for a_note in additional_notes if ".md" in a_note
+                )
+            tex.append(line)
+
+        note_tex, linked_notes = tuple(tex), tuple(linked_notes)
+        if len(_CONVERTED_NOTES) >= _CONVERTED_NOTES_SIZE:
+            # Forget the note converted first
+            del _CONVERTED_NOTES[next(iter(_CONVERTED_NOTES))]
+        _CONVERTED_NOTES[key] = (note_tex, linked_notes, tuple(found_paths))
+        return note_tex, linked_notes
+
+    @property
+    def note_tex(self) -> str:
+        """Latex code of all the notes added so far."""
+        return "".join(self._note_parts)
+
+    @note_tex.setter
+    def note_tex(self, value: str):
+        self._note_parts = [value]
+
     @staticmethod
     def replace_text_style(line: str) -> str:
         """Replace a bunch of markdown syntax to latex.
-            Saves all the non-transformed text, applies the
-            transformations and reverts then when needed.
+            Math equations are replaced with placeholders before
+            the transformations and put back afterwards.
 
         Args:
             line (str): Current line of the note.
@@ -325,113 +642,92 @@ boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}}
         Returns:
             str: Transformed line.
         """
-        # check if math equation is present
-        if ((line.count("$") % 1 == 0) and (line.count("$") > 1)) or (
-            (line.count("$$") % 1 == 0) and ((line.count("$$") > 1))
-        ):
-            original_content_math = re.findall(r"\$\$(.*?)\$\$", line) + re.findall(
-                r"\$(.*?)\$", line
-            )
+        # Keep math equations out of the transformations
+        line, math_spans = _protect_math(line)
         # Find italic words
-        all_italics = re.findall(r"_(.*?)_", line)
+        all_italics = _ITALIC_RE.findall(line)
         # Find bold words
-        all_bolds = re.findall(r"\*\*(.*?)\*\*", line)
+        all_bolds = _BOLD_RE.findall(line)
         # Find highlighted words
-        all_hls = re.findall(r"==(.*?)==", line)
-        link_bool = False
-        if (
-            "[" in line
-            and "]" in line
-            and "(" in line
-            and ")" in line
-            and ("http" in line or "www" in line)
-        ):
-            links = re.findall(r"\]\((.*?)\)", line)
-            text_for_links = re.findall(r"\[(.*?)\]\(", line)
-            link_bool = True
+        all_hls = _HL_RE.findall(line)
+        # Find hyperlinks as (text, link) pairs
+        all_links = []
+        if "](" in line and ("http" in line or "www" in line):
+            all_links = _LINK_TXT_RE.findall(line)
         # Find all inline code
-        all_inline = re.findall(r"`(.+?)`", line)
+        all_inline = _INLINE_RE.findall(line)
 
         # Apply latex changes to special characters
-        line = line.replace("&", "\\&")
-        line = line.replace("%", "\\%")
-        # line = line.replace("$", "\\$")
-        # line = line.replace(">", "\\>")
-        # line = line.replace("<", "\\<")
-        line = line.replace("#", "\\#")
-        line = line.replace("---", "\\noindent\\rule[0.5ex]{\\linewidth}{1pt}")
-        line = line.replace("***", "\\noindent\\rule[0.5ex]{\\linewidth}{1pt}")
-        line = line.replace("_", "\\_")
-
-        for word, word_new in zip(all_italics, re.findall(r"\\_(.*?)\\_", line)):
-            line = line.replace(f"\\_{word_new}\\_", f"\\textit{{{word}}}")
-        for word, word_new in zip(all_bolds, re.findall(r"\*\*(.*?)\*\*", line)):
-            line = line.replace(f"**{word_new}**", f"\\textbf{{{word}}}")
-        for word, word_new in zip(all_hls, re.findall(r"==(.*?)==", line)):
-            line = line.replace(f"=={word_new}==", f"\\hl{{{word}}}")
+        line = line.translate(_ESCAPE_TABLE)
+        line = _RULE_RE.sub(lambda _: _RULE_LATEX, line)
+
+        # The replacements use the content found before escaping the special characters
+        line = _sub_in_order(
+            _ESCAPED_ITALIC_RE, line, all_italics, lambda word: f"\\textit{{{word}}}"
+        )
+        line = _sub_in_order(
+            _BOLD_RE, line, all_bolds, lambda word: f"\\textbf{{{word}}}"
+        )
+        line = _sub_in_order(_HL_RE, line, all_hls, lambda word: f"\\hl{{{word}}}")
 
         # Replace hyperlinks
-        if link_bool:
-            links_new = re.findall(r"\]\((.*?)\)", line)
-            text_for_links_new = re.findall(r"\[(.*?)\]\(", line)
-            for txt, link, txt_new, link_new in zip(
-                text_for_links, links, text_for_links_new, links_new
-            ):
-                line = line.replace(
-                    f"[{txt_new}]({link_new})", f"\\href{{{link}}}{{{txt}}}"
-                )
+        if all_links:
+            line = _sub_in_order(
+                _LINK_TXT_RE,
+                line,
+                all_links,
+                lambda txt_link: f"\\href{{{txt_link[1]}}}{{{txt_link[0]}}}",
+            )
 
-        for word, word_new in zip(all_inline, re.findall(r"`(.+?)`", line)):
-            if word != "`":
-                line = line.replace(
-                    f"`{word_new}`",
-                    "\\inlinecode[bgcolor=LightGray, fontsize=\\scriptsize]{"
-                    + word
-                    + "}",
-                )
+        line = _sub_in_order(
+            _INLINE_RE,
+            line,
+            all_inline,
+            lambda word: None
+            if word == "`"
+            else "\\inlinecode[bgcolor=LightGray, fontsize=\\scriptsize]{"
+            + word
+            + "}",
+        )
         # Find and replace tags
-        for word in line.split():
-            if (
-                (word.startswith("#") or word.startswith("\\#"))
-                and len(word) > 1
-                and ((word.count("#") == 1) or (word.count("\\#") == 1))
-            ):
-                line = line.replace(word, f"\\pill{{{word}}}")
-        # Reverse these fixes if they are in a math block
-        if ((line.count("$") % 1 == 0) and (line.count("$") > 1)) or (
-            (line.count("$$") % 1 == 0) and ((line.count("$$") > 1))
-        ):
-            contents_of_math = re.findall(r"\$\$(.*?)\$\$", line) + re.findall(
-                r"\$(.*?)\$", line
-            )
-            for e, content in enumerate(contents_of_math):
-                line = line.replace(content, original_content_math[e])
-        return line
+        line = _TAG_RE.sub(lambda m: f"\\pill{{{m.group(0)}}}", line)
+        return _restore_math(line, math_spans)
 
     # Find and add linked notes
 
     def _apply_transformation(
-        self, line: str, current_line_idx: int, note_content: list
+        self,
+        line: str,
+        lstripped: str,
+        current_line_idx: int,
+        note_content: list,
+        blocks: dict = None,
+        footnote_defs: dict = None,
     ) -> Tuple[str, list, list]:
         """Applies a set of transformations to convert from markdown to latex.
 
         Args:
             line (str): The current line of the note.
+            lstripped (str): The current line without its leading spaces.
             current_line_idx (int): The current line index.
             note_content (list): List containing all the lines of the note.
+            blocks (dict, optional): Blocks of the note found by `_scan_blocks`. Computed when not given.
+            footnote_defs (dict, optional): Footnote definitions found by `_scan_footnotes`. Computed when needed and not given.
 
         Returns:
             Tuple[str, list, list]: The transformed line, the lines to skip and the names of additional notes to add.
         """
         lines_to_skip = []
+        if blocks is None:
+            blocks = _scan_blocks(note_content)
         # Check if we reached an obsidian pluggin settings
-        if line.lstrip().startswith("%%") or line.lstrip().startswith(">%%"):
+        if lstripped.startswith(("%%", ">%%")):
             return "", [i for i in range(current_line_idx, len(note_content))], []
         line, lines_to_skip, is_table = self.convert_to_latex_table(
-            line, current_line_idx, note_content
+            line, current_line_idx, note_content, blocks
         )
         # Check for front matter and handle it
-        if line.lstrip().startswith("---") and current_line_idx == 0:
+        if lstripped.startswith("---") and current_line_idx == 0:
             lines_to_skip.append(current_line_idx)
             for ln, next_line in enumerate(note_content[current_line_idx + 1 :], 1):
                 lines_to_skip.append(ln)
@@ -439,9 +735,10 @@ boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}}
                     break
             line = ""
             return line, lines_to_skip, []
-        additional_notes = self.check_for_linked_notes(line)
+        # Most lines do not link any note
+        links = _LINK_NOTE_RE.findall(line) if "[[" in line else []
+        additional_notes = self.check_for_linked_notes(line, links)
         if len(additional_notes) > 0:
-            links = re.findall(r"\[\[(.*?)\]\]", line)
             for link in links:
                 logger.debug(f"link: {link}")
                 # In case there are multiple separators, but this does happen really when linking notes.
@@ -452,54 +749,63 @@ boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}}
                 split_link = f"\\hyperref[ch:{split_link_file}]{{{split_link_alias}}}"
                 line = line.replace(f"[[{link}]]", split_link)
                 logger.debug(f"line: {line}")
-                note_content[current_line_idx] = line
+            lstripped = line.lstrip()
 
         logger.debug(f"is_table: {is_table}")
         if is_table:
             return line, lines_to_skip, additional_notes
         line, lines_to_skip = self.convert_callouts_block_text(
-            current_line_idx, note_content
+            current_line_idx, note_content, line, lstripped, blocks
         )
         if len(lines_to_skip) > 0:
             return line, lines_to_skip, additional_notes
 
         return self.apply_conversion_routine(
-            line, current_line_idx, note_content, additional_notes
+            line,
+            current_line_idx,
+            note_content,
+            additional_notes,
+            blocks,
+            footnote_defs,
         )
 
     def convert_callouts_block_text(
-        self, current_line_idx: int, note_content: list
+        self,
+        current_line_idx: int,
+        note_content: list,
+        current_line: str = None,
+        lstripped: str = None,
+        blocks: dict = None,
     ) -> Tuple[str, list]:
         """Converts callouts and block text syntax to latex.
 
         Args:
             current_line_idx (int): Current line number.
             note_content (list): Lidt of lines in the note.
+            current_line (str, optional): The current line, if it was modified. Defaults to the line in `note_content`.
+            lstripped (str, optional): The current line without its leading spaces. Computed when not given.
+            blocks (dict, optional): Blocks of the note found by `_scan_blocks`. Computed when not given.
 
         Returns:
             Tuple[str, list]: Return the transformed line and a list of lines to skip.
         """
-        counter = 0
         lines_to_skip = []
-        line = note_content[current_line_idx]
+        line = note_content[current_line_idx] if current_line is None else current_line
+        if lstripped is None:
+            lstripped = line.lstrip()
 
         # Check if this is the start of a block quote
-        if line.lstrip().startswith(">"):
-            # Count the number of block quotes
-            counter += 1
-            for next_line in note_content[current_line_idx + 1 :]:
-                if next_line.lstrip().startswith(">"):
-                    counter += 1
-                else:
-                    break
-            lines_to_skip = [
-                i for i in range(current_line_idx, current_line_idx + counter)
-            ]
+        if lstripped.startswith(">"):
+            if blocks is None:
+                blocks = _scan_blocks(note_content)
+            # All the following lines starting with ">" are part of the block
+            _, quote_end = blocks[current_line_idx]
+            lines_to_skip = [i for i in range(current_line_idx, quote_end + 1)]
             logger.debug(
                 f"lines_to_skip in convert_callouts_block_text: {lines_to_skip}"
             )
             # Remove text in between [! and ] and replace it with a empty text
-            txt_to_replace = re.findall(r"\[!(.*?)\]", line)
+            txt_to_replace = _CALLOUT_RE.findall(line)
             if len(txt_to_replace) > 0:
                 txt_to_replace = txt_to_replace[0]
                 line = self.replace_text_style(
@@ -532,6 +838,8 @@ boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}}
         current_line_idx: int,
         note_content: list,
         additional_notes: list,
+        blocks: dict = None,
+        footnote_defs: dict = None,
     ) -> Tuple[str, list, list]:
         """Group apply multiple functions to change the markdown syntax to latex.
 
@@ -540,45 +848,62 @@ boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}}
             current_line_idx (int): The current line number.
             note_content (list): List of lines in the note.
             additional_notes (list): List of the name of additional notes to add.
+            blocks (dict, optional): Blocks of the note found by `_scan_blocks`. Computed when needed and not given.
+            footnote_defs (dict, optional): Footnote definitions found by `_scan_footnotes`. Computed when needed and not given.
 
         Returns:
             Tuple[str, list, list]: Return the transformed line, a list of lines to skip and a list of additional notes.
         """
         lines_to_skip = []
-        line, is_section = self.replace_md_headers(line)
-        logger.debug(f"is_section: {is_section}")
-        if is_section:
-            return line, lines_to_skip, additional_notes
+        # Each conversion is only tried when the start of the line allows it
+        if line.startswith("#"):
+            line, is_section = self.replace_md_headers(line)
+            logger.debug(f"is_section: {is_section}")
+            if is_section:
+                return line, lines_to_skip, additional_notes
 
         line = self.replace_text_style(line)
+        lstripped = line.lstrip()
         logger.debug(f"line-apply_conv_rt = {line}")
-        line, lines_to_skip, is_math = self.keep_math(
-            line, current_line_idx, note_content
-        )
-        line, additional_lines_to_skip = self.find_replace_footnotes(
-            line, note_content, current_line_idx
-        )
-        lines_to_skip += additional_lines_to_skip
+        is_math = False
+        if lstripped.startswith("$$"):
+            line, lines_to_skip, is_math = self.keep_math(
+                line, current_line_idx, note_content, lstripped, blocks
+            )
+        if "[^" in line:
+            line, additional_lines_to_skip = self.find_replace_footnotes(
+                line, note_content, current_line_idx, footnote_defs
+            )
+            if additional_lines_to_skip:
+                # The footnotes were added to the line
+                lstripped = line.lstrip()
+            lines_to_skip += additional_lines_to_skip
         logger.debug(f"is_math: {is_math}")
         if is_math:
             return line, lines_to_skip, additional_notes
 
-        line, additional_lines_to_skip, is_codeblock = self.replace_md_code_block(
-            line, current_line_idx, note_content
-        )
-        lines_to_skip += additional_lines_to_skip
-        logger.debug(f"is_codeblock: {is_codeblock}")
-        if is_codeblock:
-            return line, lines_to_skip, additional_notes
-        line, additional_lines_to_skip, is_bullet_point = self.replace_md_bullet_point(
-            line, current_line_idx, note_content, CONFIG["indent"]
-        )
-        lines_to_skip += additional_lines_to_skip
-        if is_bullet_point:
-            return line, lines_to_skip, additional_notes
+        if lstripped.startswith("```"):
+            line, additional_lines_to_skip, is_codeblock = self.replace_md_code_block(
+                line, current_line_idx, note_content, lstripped, blocks
+            )
+            lines_to_skip += additional_lines_to_skip
+            logger.debug(f"is_codeblock: {is_codeblock}")
+            if is_codeblock:
+                return line, lines_to_skip, additional_notes
+        if lstripped.startswith("-"):
+            (
+                line,
+                additional_lines_to_skip,
+                is_bullet_point,
+            ) = self.replace_md_bullet_point(
+                line, current_line_idx, note_content, CFG.indent, lstripped, blocks
+            )
+            lines_to_skip += additional_lines_to_skip
+            if is_bullet_point:
+                return line, lines_to_skip, additional_notes
 
         # Remove leading spaces
-        line = line.lstrip()
+        line = lstripped
         return line, lines_to_skip, additional_notes
 
     @staticmethod
@@ -612,60 +937,21 @@ boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}}
         Returns:
             Tuple[str, bool]: Return the transformed line and a boolean indicating if it's a section/subsection/subsubsection or none of them.
         """
-        is_section = False
-        lstrip_line_space = line.lstrip()
-        lstrip_line_hashtag = line.lstrip("#")
-        if lstrip_line_space.startswith("#"):
-            count_lead_hashtags = len(line) - len(lstrip_line_hashtag)
-            # Empty str means that it's not an hastag
-            if lstrip_line_hashtag[0] == " ":
-                if count_lead_hashtags >= 5:
-                    # Default for all other levels
-                    hashtags = ["#"] * count_lead_hashtags
-                    hashtags = "".join(hashtags)
-                    line = (
-                        f"\\noindent\\mysubparagraph{{{lstrip_line_space.replace(f'{hashtags} ', '')}}}".replace(
-                            "\n", ""
-                        )
-                        + "\n"
-                    )
-                    is_section = True
-                elif count_lead_hashtags == 4:
-                    line = (
-                        f"\\noindent\\myparagraph{{{lstrip_line_space.replace('#### ', '')}}}".replace(
-                            "\n", ""
-                        )
-                        + "\n"
-                    )
-                    is_section = True
-                elif count_lead_hashtags == 3:
-                    line = (
-                        f"\\subsubsection{{{lstrip_line_space.replace('### ', '')}}}".replace(
-                            "\n", ""
-                        )
-                        + "\n"
-                    )
-                    is_section = True
-                elif count_lead_hashtags == 2:
-                    line = (
-                        f"\\subsection{{{lstrip_line_space.replace('## ', '')}}}".replace(
-                            "\n", ""
-                        )
-                        + "\n"
-                    )
-                    is_section = True
-                elif count_lead_hashtags == 1:
-                    line = (
-                        f"\\section{{{lstrip_line_space.replace('# ', '')}}}".replace(
-                            "\n", ""
-                        )
-                        + "\n"
-                    )
-                    is_section = True
-        return line, is_section
+        match = _HEADER_RE.match(line)
+        if match is None:
+            return line, False
+        # Levels 5 and higher all use the last command
+        level = min(len(match.group(1)), len(_HEADER_CMDS))
+        title = match.group(2).translate(_ESCAPE_TABLE)
+        return f"{_HEADER_CMDS[level - 1]}{{{title}}}\n", True
 
     def keep_math(
-        self, line: str, current_line_idx: int, lines: list
+        self,
+        line: str,
+        current_line_idx: int,
+        lines: list,
+        lstripped: str = None,
+        blocks: dict = None,
     ) -> Tuple[str, list, bool]:
         """Keep math formulas in latex syntax.
 
@@ -673,30 +959,35 @@ boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}}
             line (str): Current line.
             current_line_idx (int): The current line number.
             lines (list): List of lines in the note.
+            lstripped (str, optional): Current line without its leading spaces. Computed when not given.
+            blocks (dict, optional): Blocks of the note found by `_scan_blocks`. Computed when needed and not given.
 
         Returns:
             Tuple[str, list, bool]: Return the transformed line, a list of lines to skip
                 and a boolean indicating if it's a math formula or not.
         """
-        lsline = line.lstrip()
+        lsline = line.lstrip() if lstripped is None else lstripped
         lines_to_skip = []
         # Check whether we have the start of a math formula
         if (lsline.startswith("$$")) and (lsline.count("$$") == 1):
-            math_start_line = copy.copy(current_line_idx)
-            for ln, line_after_line in enumerate(
-                lines[current_line_idx + 1 :], current_line_idx + 1
-            ):
-                lines_to_skip.append(ln)
-                logger.debug(f"line_after_line: {line_after_line}")
-                lsline_after_line = line_after_line.lstrip()
-                if "$$" in lsline_after_line:
-                    line = "".join(lines[math_start_line : ln + 1])
-                    return line, lines_to_skip, True
-        else:
-            return line, lines_to_skip, False
+            if blocks is None:
+                blocks = _scan_blocks(lines)
+            kind, math_end_line = blocks.get(current_line_idx, (None, None))
+            if kind == "math":
+                lines_to_skip = [
+                    i for i in range(current_line_idx + 1, math_end_line + 1)
+                ]
+                line = "".join(lines[current_line_idx : math_end_line + 1])
+                return line, lines_to_skip, True
+        return line, lines_to_skip, False
 
     def replace_md_code_block(
-        self, line: str, current_line_idx: int, lines: list
+        self,
+        line: str,
+        current_line_idx: int,
+        lines: list,
+        lstripped: str = None,
+        blocks: dict = None,
     ) -> Tuple[str, list, bool]:
         """Replace markdown code block with latex code block.
 
@@ -704,47 +995,46 @@ boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}}
             line (str): The current line.
             current_line_idx (int): The current line number.
             lines (list): List of lines in the note.
+            lstripped (str, optional): The current line without its leading spaces. Computed when not given.
+            blocks (dict, optional): Blocks of the note found by `_scan_blocks`. Computed when needed and not given.
 
         Returns:
             Tuple[str, list, bool]: Return the transformed line, a list of lines to skip,
                 boolean indicating if it's a code block or not.
         """
-        ticks_counter = 0
-        lsline = line.lstrip()
+        lsline = line.lstrip() if lstripped is None else lstripped
         lines_to_skip = []
         # Check whether we have the start of a code block
         if lsline.startswith("```"):
-            language = lsline.replace("```", "").replace(" ", "").replace("\n", "")
-            ticks_counter += 1
-            logger.debug(f"ticks_counter: {ticks_counter}")
-            code_start_line = current_line_idx + 1
-            # Find the next ticks and the end of the code block
-            for ln, line_after_line in enumerate(
-                lines[current_line_idx + 1 :], current_line_idx + 1
-            ):
-                logger.debug(f"line_after_line: {line_after_line}")
-                lsline_after_line = line_after_line.lstrip()
-                if lsline_after_line.startswith("```"):
-                    # Increase tick counter since it was found
-                    ticks_counter += 1
-                    logger.debug(f"ticks_counter-after increasing: {ticks_counter}")
-                if ticks_counter == 2:
-                    # This has to be the end of the code block
-                    logger.debug(f"line (before join): {lines[code_start_line: ln]}")
-                    line = "".join(lines[code_start_line:ln])
-                    # Remove last blank line in line
-                    line = line[: line.rfind("\n")]
-                    # These are the lines we do not want to add to the note anymore
-                    logger.debug(f"line (after join): {line}")
-                    logger.debug(f"language: {language}.")
-                    lines_to_skip += [i for i in range(code_start_line, ln + 1)]
-                    line = self.convert_to_latex_code(line, language)
-                    return line, lines_to_skip, True
-        else:
-            return line, lines_to_skip, False
+            if blocks is None:
+                blocks = _scan_blocks(lines)
+            kind, code_end_line = blocks.get(current_line_idx, (None, None))
+            if kind == "code":
+                # Only the trailing line ending has to be removed
+                language = lsline.rstrip("\n").replace("```", "").replace(" ", "")
+                code_start_line = current_line_idx + 1
+                logger.debug(
+                    f"line (before join): {lines[code_start_line: code_end_line]}"
+                )
+                line = "".join(lines[code_start_line:code_end_line])
+                # Remove last blank line in line
+                line = line[: line.rfind("\n")]
+                # These are the lines we do not want to add to the note anymore
+                logger.debug(f"line (after join): {line}")
+                logger.debug(f"language: {language}.")
+                lines_to_skip += [i for i in range(code_start_line, code_end_line + 1)]
+                line = self.convert_to_latex_code(line, language)
+                return line, lines_to_skip, True
+        return line, lines_to_skip, False
 
     def replace_md_bullet_point(
-        self, line: str, current_line_idx: int, lines: list, indent: int = 4
+        self,
+        line: str,
+        current_line_idx: int,
+        lines: list,
+        indent: int = 4,
+        lstripped: str = None,
+        blocks: dict = None,
     ) -> Tuple[str, list, bool]:
         """Replaces markdown bullet points with latex bullet points.
 
@@ -753,68 +1043,60 @@ boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}}
             current_line_idx (int): The current line number.
             lines (list): List of lines in the note.
             indent (int, optional): The number of spaces that correspond to an indent. Defaults to 4.
+            lstripped (str, optional): The current line without its leading spaces. Computed when not given.
+            blocks (dict, optional): Blocks of the note found by `_scan_blocks`. Computed when needed and not given.
 
         Returns:
             Tuple[str, list, bool]: Return the transformed line, a list of lines to skip, and boolean indicating if it's a bullet point or not.
         """
         logger.debug(f"current_line_idx = {current_line_idx}")
-        lsline = line.lstrip()
+        lsline = line.lstrip() if lstripped is None else lstripped
         pre_space_diff = len(line) - len(lsline)
-        space_diff = None
         lines_to_skip = []
         # Check whether we have the start of a code block
         if lsline.startswith("-"):
-            line = "\\begin{itemize}\n" + "\\item " + line.lstrip("- ")
-            for ln, line_after_line in enumerate(
-                lines[current_line_idx + 1 :], current_line_idx + 1
-            ):
+            if blocks is None:
+                blocks = _scan_blocks(lines)
+            # The bullet points that follow this one are part of the same list
+            kind, list_end = blocks.get(current_line_idx + 1, (None, None))
+            if kind != "list":
+                list_end = current_line_idx
+            # Pieces of the latex list, joined once the list is complete
+            # Only the dash of the bullet point is removed, not the dashes of the text
+            parts = ["\\begin{itemize}\n", "\\item ", lsline[1:].lstrip(" ")]
+            for ln in range(current_line_idx + 1, list_end + 1):
                 logger.debug(f"ln = {ln}")
-                line_after_line = self.replace_text_style(line_after_line)
+                line_after_line = self.replace_text_style(lines[ln])
                 logger.debug(
                     f"line_after_line-replace_md_bullet_point = {line_after_line}"
                 )
-                if line_after_line.lstrip().startswith("-"):
+                if line_after_line.startswith("\t"):
+                    # Each tab counts as an indent
+                    ls_line_after_line = line_after_line.lstrip("\t")
+                    space_diff = (
+                        len(line_after_line) - len(ls_line_after_line)
+                    ) * indent
+                    ls_line_after_line = ls_line_after_line.lstrip()
+                else:
                     ls_line_after_line = line_after_line.lstrip()
                     space_diff = len(line_after_line) - len(ls_line_after_line)
-                    if line_after_line.startswith("\t"):
-                        space_diff = (
-                            len(line_after_line) - len(line_after_line.lstrip("\t"))
-                        ) * indent
-                        line_after_line = line_after_line.lstrip("\t")
-                    if space_diff == pre_space_diff:
-                        line += "\\item " + line_after_line.lstrip("- ") + "\n"
-                    elif space_diff > pre_space_diff:
-                        line += (
-                            "\\begin{itemize}\n"
-                            + "\\item "
-                            + line_after_line.lstrip("- ")
-                            + "\n"
-                        )
-                    elif space_diff < pre_space_diff:
-                        for _ in range((pre_space_diff - space_diff) // indent):
-                            line += "\\end{itemize}\n"
-                        line += "\\item " + line_after_line.lstrip("- ") + "\n"
-                    pre_space_diff = space_diff
-                    lines_to_skip.append(ln)
-                    # Handle cases where the last line is a bullet point
-                    if ln == len(lines) - 1:
-                        line += "\\end{itemize}\n"
-                        for _ in range(space_diff // indent):
-                            line += "\\end{itemize}\n"
-                        return line, lines_to_skip, True
-                else:
-                    line += "\\end{itemize}\n"
-                    current_space_diff = space_diff if space_diff else pre_space_diff
-                    for _ in range(current_space_diff // indent):
-                        line += "\\end{itemize}\n"
-                    return line, lines_to_skip, True
+                if space_diff > pre_space_diff:
+                    parts.append("\\begin{itemize}\n")
+                elif space_diff < pre_space_diff:
+                    closed_lists = (pre_space_diff - space_diff) // indent
+                    parts.append("\\end{itemize}\n" * closed_lists)
+                parts.extend(("\\item ", ls_line_after_line[1:].lstrip(" "), "\n"))
+                pre_space_diff = space_diff
+                lines_to_skip.append(ln)
+            parts.append("\\end{itemize}\n" * (1 + pre_space_diff // indent))
+            return "".join(parts), lines_to_skip, True
         else:
             # Skip the line
             return line, lines_to_skip, False
 
     @staticmethod
     def convert_to_latex_table(
-        line: str, current_line_idx: int, lines: list
+        line: str, current_line_idx: int, lines: list, blocks: dict = None
     ) -> Tuple[str, list, bool]:
         """Convert a markdown table to a latex table
 
@@ -822,6 +1104,7 @@ boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}}
             line (str): The current line.
             current_line_idx (int): The current line number.
             lines (list): List of lines in the note.
+            blocks (dict, optional): Blocks of the note found by `_scan_blocks`. Computed when needed and not given.
 
         Returns:
             Tuple[str, list, bool]: Return the transformed line, a list of lines to skip, and boolean indicating if it's a table or not.
@@ -831,40 +1114,29 @@ boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}}
             # This is a table
             # Get the number of columns
             num_cols = line.count("|") - 1
-            # Get the number of rows
-            num_rows = 1
-            for line_after_line in lines[current_line_idx:]:
-                if line_after_line.startswith("|"):
-                    num_rows += 1
-                else:
-                    break
-            lines_to_skip = [
-                i for i in range(current_line_idx + 1, current_line_idx + num_rows - 1)
-            ]
+            # Get the last row
+            if blocks is None:
+                blocks = _scan_blocks(lines)
+            _, table_end = blocks[current_line_idx]
+            lines_to_skip = list(range(current_line_idx + 1, table_end + 1))
             logger.debug(f"lines_to_skip: {lines_to_skip}")
 
-            # Create the latex table
-            latex_table = "\\begin{tabular}{|"
-            for _ in range(num_cols):
-                latex_table += "c|"
-            latex_table += "}\n"
-            latex_table += "\\hline\n"
-            for row in range(current_line_idx, current_line_idx + num_rows - 1):
+            # Create the latex table, from pieces joined at the end
+            parts = ["\\begin{tabular}{|", "c|" * num_cols, "}\n\\hline\n"]
+            for row in range(current_line_idx, table_end + 1):
                 line_splitted = lines[row].split("|")
-                bool_md_separation = all(
-                    [True if "---" in i else False for i in line_splitted[1:-1]]
-                )
+                bool_md_separation = all("---" in i for i in line_splitted[1:-1])
                 if bool_md_separation:
                     continue
+                logger.debug(f"line={lines[row]}")
                 for col in range(num_cols + 1):
-                    logger.debug(f"line={lines[row]}")
-                    latex_table += line_splitted[col].strip()
-                    if col not in [0, num_cols]:
-                        latex_table += " & "
-
-                latex_table += "\\\\ \\hline\n"
-            latex_table += "\\end{tabular}\n"
-            return latex_table, lines_to_skip, True
+                    parts.append(line_splitted[col].strip())
+                    if col not in (0, num_cols):
+                        parts.append(" & ")
+
+                parts.append("\\\\ \\hline\n")
+            parts.append("\\end{tabular}\n")
+            return "".join(parts), lines_to_skip, True
         else:
             return line, lines_to_skip, False
 
@@ -879,47 +1151,12 @@ boxsep=0pt,left=6pt,right=6pt,top=2pt,bottom=2pt}}
         Returns:
             str: Return the transformed line.
         """
-        python3 = "true" if language.lower() == "python" else "false"
         if (language != "") and (language.lower() != "plaintext"):
-            label = CONFIG["code"]["label"]
-            if label:
-                label = language
-            else:
-                label = "none"
-            line = f"""
-\\begin{{minted}}[
-frame=lines,
-framesep=2mm,
-label={label},
-framerule={CONFIG["code"]["frame rule"]},
-python3={python3},
-baselinestretch=1.2,
-breaklines=true,
-bgcolor=LightGray,
-fontsize=\\footnotesize,
-fontfamily={CONFIG["code"]["font family"]},
-linenos
-]{{{language}}}
-{line}
-\\end{{minted}}
-            """
-        else:
-            line = f"""
-\\begin{{minted}}[
-frame=lines,
-framesep=2mm,
-baselinestretch=1.2,
-framerule={CONFIG["code"]["frame rule"]},
-fontfamily={CONFIG["code"]["font family"]},
-breaklines=true,
-bgcolor=LightGray,
-fontsize=\\footnotesize,
-linenos
-]{{text}}
-{line}
-\\end{{minted}}
-            """
-        return line
+            python3 = "true" if language.lower() == "python" else "false"
+            return _CODE_TEMPLATE_LANG.format(
+                language=language, python3=python3, content=line
+            )
+        return _CODE_TEMPLATE_PLAIN.format(content=line)
 
     @staticmethod
     def replace_md_inline_code(txt: str) -> str:
@@ -931,7 +1168,7 @@ linenos
         Returns:
             str: Return the transformed text.
         """
-        inline_code_lang = CONFIG["inline code"]["default language"]
+        inline_code_lang = CFG.inline_code_lang
         return "\\mintinline{{" + inline_code_lang + "}}{{" + txt + "}}"
 
     def save(self, path: str = "./notes.tex"):
@@ -940,16 +1177,18 @@ linenos
         Args:
             path (str, optional): The name (or path) of the latex file to create. Defaults to "./notes.tex".
         """
-        # Insert notes
-        self.document = self.document.format(self.note_tex)
-        logger.debug(self.document)
-        # Save file
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(self.document + "\n" + self.note_tex + "\n\\end{document}\n")
+        # Save file, the notes are written one after the other after the preamble
         with open(path, "w", encoding="utf-8") as f:
             f.write(self.document)
+            f.write("\n")
+            f.writelines(self._note_parts)
+            f.write("\n\\end{document}\n")
 
     @staticmethod
     def find_replace_footnotes(
-        line: str, lines: list, current_line_idx: int
+        line: str, lines: list, current_line_idx: int, footnote_defs: dict = None
     ) -> Tuple[str, list]:
         """Find all footnotes in the text and return the text without the footnotes and the list of footnotes.
 
@@ -957,35 +1196,41 @@ linenos
             line (str): Line to search for footnotes.
             lines (list): List containing line to search for footnotes
             current_line_idx (int): Index of the current line in the list of lines.
+            footnote_defs (dict, optional): Footnote definitions found by `_scan_footnotes`. Computed when not given.
 
         Returns:
             Tuple[str, list]: Text with replaced footnotes, and list of lines to skip.
         """
-        footnotes = re.findall(r"\[\^(\d+)\]", line)
         lines_to_skip = []
+        if "[^" not in line:
+            return line, lines_to_skip
+        footnotes = _FOOTNOTE_RE.findall(line)
+        if footnotes and footnote_defs is None:
+            footnote_defs = _scan_footnotes(lines)
         for footnote in footnotes:
             foot_note_in_line = f"[^{footnote}]"
             logger.debug(f"foot_note_in_line: {foot_note_in_line}")
-            # Search through the lines after the current line for the footnote definition
-            # Manage when the next line is the last line
-            length_lines = (
-                len(lines) if current_line_idx + 1 < len(lines) else len(lines) + 1
+            # The footnote definition is the first one after the current line
+            line_idx = next(
+                (
+                    idx
+                    for idx in footnote_defs.get(footnote, ())
+                    if idx > current_line_idx
+                ),
+                None,
+            )
+            if line_idx is None:
+                continue
+            check_text = f"{foot_note_in_line}:"
+            # Extract the footnote definition
+            footnote_definition = (
+                lines[line_idx].lstrip().removeprefix(check_text).lstrip()
+            )
+            lines_to_skip.append(line_idx)
+            line = line.replace(
+                foot_note_in_line,
+                f"\\footnote[{footnote}]{{{footnote_definition}}}",
             )
-            for line_idx in range(current_line_idx + 1, length_lines):
-                if (length_lines > len(lines)) and (line_idx >= len(lines)):
-                    continue
-                check_text = f"{foot_note_in_line}:"
-                if check_text in lines[line_idx]:
-                    # Extract the footnote definition
-                    footnote_definition = (
-                        lines[line_idx].lstrip(f"{check_text}").lstrip()
-                    )
-                    lines_to_skip.append(line_idx)
-                    line = line.replace(
-                        foot_note_in_line,
-                        f"\\footnote[{footnote}]{{{footnote_definition}}}",
-                    )
-                    break
         return line, lines_to_skip
 
     @staticmethod
@@ -996,28 +1241,34 @@ linenos
         quiet: bool = True,
         use_same_directory: bool = True,
     ):
-        """Generate the pdf file using `pdflatex`.
+        """Generate the pdf file using `latexmk` if it is installed, `pdflatex` otherwise.
 
         Args:
             path (str, optional): Path or name of the latex file that will be transformed to a pdf. Defaults to "./notes.tex".
             clear (bool, optional): If `True`, folders and files created by `pdflatex` will be automatically deleted. Defaults to False.
             toc (bool, optional): If `True`, the Table of Content will be included in the pdf. Defaults to False.
-            quiet (bool, optional): If `True`, `pdflatex` will not print in the console (this works only on some versions of Latex). Defaults to True.
+            quiet (bool, optional): If `True`, the output of `pdflatex` will not be printed in the console. Defaults to True.
             use_same_directory (bool, optional): If `True`, the pdf is generated in the same directory as the latex file.
                 Otherwise, it is generated in the current directory from which the code was ran. Defaults to True.
         """
-        parent_dir = str(pathlib.Path(path).parent)
-        file_name = str(pathlib.Path(path).name)
+        tex_path = pathlib.Path(path)
+        parent_dir = str(tex_path.parent)
+        file_name = tex_path.name
+        # Files created by `pdflatex` are named after the latex file
+        stem = tex_path.stem
         # Convert paths to forward slashes
-        path = str(pathlib.Path(path).as_posix())
+        path = tex_path.as_posix()
+        # Path of the latex file without its suffix
+        path_no_suffix = tex_path.with_suffix("").as_posix()
         # Generate pdf
         logger.debug(f"Generating pdf: {path}")
-        if quiet:
+        if _LATEXMK_INSTALLED:
+            # -f keeps going on latex errors, like pdflatex in nonstopmode
             cmd_line = [
-                "pdflatex",
-                "-quiet",
-                "-interaction",
-                "nonstopmode",
+                "latexmk",
+                "-pdf",
+                "-f",
+                "-interaction=nonstopmode",
                 "-shell-escape",
                 path,
             ]
@@ -1029,10 +1280,14 @@ linenos
                 "-shell-escape",
                 path,
             ]
-        subprocess.run(cmd_line)
-        # A Second pass is necessary to generate the table of contents https://tex.stackexchange.com/questions/301103/empty-table-of-contents
-        if toc:
-            subprocess.run(cmd_line)
+        stdout = subprocess.DEVNULL if quiet else None
+        subprocess.run(cmd_line, stdout=stdout)
+        # Without latexmk, a second pass is necessary to generate the table of contents https://tex.stackexchange.com/questions/301103/empty-table-of-contents
+        if toc and not _LATEXMK_INSTALLED:
+            subprocess.run(cmd_line, stdout=stdout)
+        # Files in the current directory, listed once
+        with os.scandir(".") as entries:
+            current_files = {entry.name for entry in entries}
         if clear:
             logger.debug(f"Removing {file_name}")
             try:
@@ -1040,62 +1295,68 @@ linenos
             except FileNotFoundError:
                 logger.debug(f"File {file_name} not found")
 
-            for file_type in [".aux", ".log", ".toc", ".out", ".pyg"]:
-                logger.debug(f'Removing {file_name.replace(".tex", file_type)}')
-                try:
-                    os.remove(file_name.replace(".tex", file_type))
-                except FileNotFoundError:
+            for file_type in _LATEX_AUX_SUFFIXES:
+                aux_file = f"{stem}{file_type}"
+                if aux_file not in current_files:
                     logger.debug(f"File {file_type} not found when removing")
+                    continue
+                logger.debug(f"Removing {aux_file}")
+                os.remove(aux_file)
+                current_files.discard(aux_file)
         if use_same_directory:
-            for file_type in [".pdf", ".tex", ".aux", ".log", ".toc", ".out", ".pyg"]:
-                logger.debug(
-                    f"Moving {file_name.replace('.tex', file_type)} to {parent_dir}"
-                )
-                # Move file to parent directory
-                try:
-                    shutil.move(
-                        file_name.replace(".tex", file_type),
-                        path.replace(".tex", file_type),
+            for file_type in _LATEX_OUTPUT_SUFFIXES:
+                output_file = f"{stem}{file_type}"
+                if output_file not in current_files:
+                    logger.debug(
+                        f"File {file_type} not found when moving to {parent_dir}"
                     )
+                    continue
+                logger.debug(f"Moving {output_file} to {parent_dir}")
+                # Move file to parent directory, with a rename when on the same file system
+                try:
+                    os.replace(output_file, f"{path_no_suffix}{file_type}")
                 except FileNotFoundError:
+                    # The latex file itself may have been removed above
                     logger.debug(
                         f"File {file_type} not found when moving to {parent_dir}"
                     )
+                except OSError:
+                    shutil.move(output_file, f"{path_no_suffix}{file_type}")
 
-        current_folder_files = os.listdir()
-        for file_or_folder in current_folder_files:
-            if "_minted-" in file_or_folder:
-                logger.debug(f"Removing {file_or_folder}")
-                shutil.rmtree(file_or_folder)
+        # minted caches its files in a folder named after the job,
+        # the spaces of the job name may be replaced in the folder name
+        for minted_dir in {f"_minted-{stem}", f"_minted-{stem.replace(' ', '_')}"}:
+            if os.path.isdir(minted_dir):
+                logger.debug(f"Removing {minted_dir}")
+                shutil.rmtree(minted_dir)
 
     @staticmethod
-    def check_for_linked_notes(line: str) -> str:
+    def check_for_linked_notes(line: str, links: list = None) -> str:
         """Checks whether there are any linked notes in the line. If so, it will
         find the path to the new note. If not, it will return the original line.
 
         Args:
             line (str): The line to check.
+            links (list, optional): The links already found in the line. Found from the line when not given.
 
         Returns:
             str: Saved paths for linked notes.
         """
-        # Find all the links in the line
-        links = re.findall(r"\[\[(.*?)\]\]", line)
         saved_paths = []
-        accepted_media_types = CONFIG["supported media"]
+        # Find all the links in the line
+        if links is None:
+            if "[[" not in line:
+                return saved_paths
+            links = _LINK_NOTE_RE.findall(line)
+        accepted_media_types = CFG.supported_media
         for link in links:
             # Make sure to keep text before any |
             link = link.split("|")[0]
-            for media_type in accepted_media_types:
-                if any(
-                    [
-                        True if accepted_type in link else False
-                        for accepted_type in accepted_media_types
-                    ]
-                ):
-                    link_file = link
-                else:
-                    link_file = link + media_type
+            if link.endswith(accepted_media_types):
+                link_files = (link,)
+            else:
+                link_files = (link + media_type for media_type in accepted_media_types)
+            for link_file in link_files:
                 actual_path = get_media_path(link_file)
                 logger.debug(f"actual_path: {actual_path}")
                 if actual_path is not None:
@@ -1115,7 +1376,7 @@ linenos
             str: Returned string with latex code.
         """
         # Convert backward slashes to forward ones
-        file_path = str(pathlib.Path(file_path).as_posix())
+        file_path = pathlib.Path(file_path).as_posix()
         file_path = f'"{file_path}"'
         line = (
             "\\begin{figure}[H]\\centering\n\t\\includegraphics"
@@ -1174,7 +1435,7 @@ def main():
         "--quiet",
         type=str,
         default="True",
-        help="Run pdflatex in quiet mode (does not work on all OS)",
+        help="Do not print the output of pdflatex",
     )
     parser.add_argument(
         "--toc", type=str, default="False", help="Include table of contents"
@@ -1,14 +1,19 @@
 import os
-import yaml
-import pathlib
 import logging
+from obsidian_pdf_gen.config import load_config
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ObiPdfGen")
-path_to_config = pathlib.Path(__file__).parent / "../config/note_configs.yaml"
-with path_to_config.open("r") as f:
-    CONFIG = yaml.safe_load(f)
+CONFIG = load_config()
 ACCEPTED_MEDIA_TYPES = CONFIG["supported media"]
+# Tuple form to use with str.endswith
+_ACCEPTED_TUPLE = tuple(ACCEPTED_MEDIA_TYPES)
+# File name -> paths of the files with that name, built on the first search
+_MEDIA_INDEX = None
+# Directory from which the media index was built
+_MEDIA_INDEX_ROOT = None
+# Incremented each time the media index is built
+_MEDIA_INDEX_GENERATION = 0
 
 
 class MediaUnsupportedError(Exception):
@@ -23,23 +28,94 @@ class MediaUnsupportedError(Exception):
         super().__init__(message)
 
 
+def _build_media_index() -> dict:
+    """Walk the current directory and its subdirectories to index the supported media files by name.
+
+    Returns:
+        dict: File name -> paths of the files with that name, in the order they were walked.
+    """
+    index = {}
+    # Depth first, in the same order as os.walk
+    stack = ["."]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                entries = list(entries)
+        except OSError:
+            # Like os.walk, skip the directories that cannot be read
+            continue
+        sub_directories = []
+        for entry in entries:
+            if entry.is_dir():
+                # Hidden folders (.obsidian, .trash, .git) and links are not searched
+                if not entry.name.startswith(".") and not entry.is_symlink():
+                    sub_directories.append(entry.path)
+            elif entry.name.endswith(_ACCEPTED_TUPLE):
+                index.setdefault(entry.name, []).append(entry.path)
+        stack.extend(reversed(sub_directories))
+    return index
+
+
+def invalidate_media_index():
+    """Forget the indexed files, the directories will be walked again on the next search."""
+    global _MEDIA_INDEX, _MEDIA_INDEX_ROOT
+    _MEDIA_INDEX = None
+    _MEDIA_INDEX_ROOT = None
+
+
+def _current_media_index() -> dict:
+    """Get the media index of the current directory, built if there is none
+    or if it was built from another directory.
+
+    Returns:
+        dict: File name -> paths of the files with that name.
+    """
+    global _MEDIA_INDEX, _MEDIA_INDEX_ROOT, _MEDIA_INDEX_GENERATION
+    current_dir = os.getcwd()
+    if _MEDIA_INDEX is None or _MEDIA_INDEX_ROOT != current_dir:
+        _MEDIA_INDEX = _build_media_index()
+        _MEDIA_INDEX_ROOT = current_dir
+        _MEDIA_INDEX_GENERATION += 1
+    return _MEDIA_INDEX
+
+
+def media_index_generation() -> int:
+    """Generation of the media index of the current directory, which is built if needed.
+    The generation changes each time the index is built, paths found with the index
+    of another generation may be outdated.
+
+    Returns:
+        int: The generation of the media index.
+    """
+    _current_media_index()
+    return _MEDIA_INDEX_GENERATION
+
+
 def get_media_path(media_name: str):
     """
-    Get the path to the media folder of a note
+    Get the path to the media folder of a note.
+    The directories are walked only once, files added afterwards are found
+    after calling `invalidate_media_index`. The directories are walked again
+    when the indexed file was deleted.
 
     Args:
         media_name (str): Name of the media file
     """
-    if not any(
-        [media_name.endswith(media_type) for media_type in ACCEPTED_MEDIA_TYPES]
-    ):
+    if not media_name.endswith(_ACCEPTED_TUPLE):
         raise MediaUnsupportedError()
 
-    for root, dirs, files in os.walk("."):
-        if media_name in files:
-            logger.debug(f"Found {media_name} in {root}")
-            return os.path.join(root, media_name)
-    return None
+    paths = _current_media_index().get(media_name)
+    if paths is None:
+        return None
+    if not os.path.exists(paths[0]):
+        logger.debug(f"{paths[0]} was deleted, walking the directories again")
+        invalidate_media_index()
+        paths = _current_media_index().get(media_name)
+        if paths is None:
+            return None
+    logger.debug(f"Found {media_name} in {os.path.dirname(paths[0])}")
+    return paths[0]
 
 
 def change_to_vault_directory():
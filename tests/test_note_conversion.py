@@ -0,0 +1,142 @@
+import os
+import pytest
+from obsidian_pdf_gen.generate_pdf.md_notes_pdf import ObsiPdfGenerator
+from obsidian_pdf_gen.media_retriever import tools
+
+
+@pytest.fixture(autouse=True)
+def fresh_media_index():
+    # Each test searches its own directory
+    tools.invalidate_media_index()
+    yield
+    tools.invalidate_media_index()
+
+
+def convert(note_path: str) -> str:
+    obsi = ObsiPdfGenerator()
+    obsi.add_note(note_paths=note_path)
+    return obsi.note_tex
+
+
+class TestNoteCaches:
+    def test_converted_note_after_invalidate(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "note.md").write_text("![[pic.png]]\n", encoding="utf-8")
+        assert "\\includegraphics" not in convert("note.md")
+
+        (tmp_path / "pic.png").write_bytes(b"")
+        tools.invalidate_media_index()
+        assert "\\includegraphics" in convert("note.md")
+
+    def test_converted_note_after_change_of_directory(self, tmp_path, monkeypatch):
+        for vault in ("va", "vb"):
+            (tmp_path / vault).mkdir()
+            (tmp_path / vault / "n.md").write_text(
+                f"{vault}\n![[pic.png]]\n", encoding="utf-8"
+            )
+
+        monkeypatch.chdir(tmp_path / "va")
+        assert "\\includegraphics" not in convert("n.md")
+        (tmp_path / "va" / "pic.png").write_bytes(b"")
+
+        # Searching from another directory builds the index again
+        monkeypatch.chdir(tmp_path / "vb")
+        convert("n.md")
+        monkeypatch.chdir(tmp_path / "va")
+        assert "\\includegraphics" in convert("n.md")
+
+    def test_linked_note_deleted(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "a.md").write_text("See [[b]]\n", encoding="utf-8")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "b.md").write_text("bravo\n", encoding="utf-8")
+        assert "bravo" in convert("a.md")
+
+        (tmp_path / "sub" / "b.md").unlink()
+        assert "bravo" not in convert("a.md")
+
+    def test_linked_note_after_invalidate(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "a.md").write_text("See [[b]]\n", encoding="utf-8")
+        assert "\\chapter{B}" not in convert("a.md")
+
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "b.md").write_text("bravo\n", encoding="utf-8")
+        # The index still lists the files found before b.md was added
+        assert "\\chapter{B}" not in convert("a.md")
+        tools.invalidate_media_index()
+        assert "\\chapter{B}" in convert("a.md")
+
+    def test_deleted_media(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "b.md").write_text("bravo\n", encoding="utf-8")
+        assert tools.get_media_path("b.md") == os.path.join(".", "sub", "b.md")
+
+        (tmp_path / "sub" / "b.md").unlink()
+        assert tools.get_media_path("b.md") is None
+
+    def test_change_of_directory(self, tmp_path, monkeypatch):
+        # Same relative path, size and modification time in both directories
+        for vault, word in (("va", "alpha"), ("vb", "bravo")):
+            (tmp_path / vault).mkdir()
+            note = tmp_path / vault / "n.md"
+            note.write_text(f"{word}\n![[pic.png]]\n", encoding="utf-8")
+            os.utime(note, (1_000_000_000, 1_000_000_000))
+        (tmp_path / "va" / "pic.png").write_bytes(b"")
+
+        monkeypatch.chdir(tmp_path / "va")
+        note_tex = convert("n.md")
+        assert "alpha" in note_tex
+        assert "\\includegraphics" in note_tex
+
+        monkeypatch.chdir(tmp_path / "vb")
+        note_tex = convert("n.md")
+        assert "bravo" in note_tex
+        assert "\\includegraphics" not in note_tex
+
+    def test_note_edited_on_disk(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        note = tmp_path / "n.md"
+        note.write_text("first\n", encoding="utf-8")
+        os.utime(note, (1_000_000_000, 1_000_000_000))
+        assert "first" in convert("n.md")
+
+        # Same size, only the modification time tells the notes apart
+        note.write_text("other\n", encoding="utf-8")
+        os.utime(note, (1_000_000_100, 1_000_000_100))
+        assert "other" in convert("n.md")
+
+
+class TestLineConversion:
+    def test_header_keeps_inner_hash(self):
+        line, is_section = ObsiPdfGenerator.replace_md_headers("# C# tips\n")
+        assert is_section
+        assert line == "\\section{C\\# tips}\n"
+
+    @pytest.mark.parametrize("fence", ["```python", "$$"], ids=["code", "math"])
+    def test_unclosed_block_kept_as_text(self, tmp_path, monkeypatch, fence):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "n.md").write_text(f"before\n{fence}\nx = 1\n", encoding="utf-8")
+        note_tex = convert("n.md")
+        assert f"\n{fence}\n" in note_tex
+        assert note_tex.endswith("x = 1\n")
+
+    def test_tag_is_not_prefix_of_longer_tag(self):
+        line = ObsiPdfGenerator.replace_text_style("#tag and #tag2\n")
+        assert line == "\\pill{\\#tag} and \\pill{\\#tag2}\n"
+
+    def test_bullet_keeps_dashes_of_text(self):
+        line, _, is_bullet_point = ObsiPdfGenerator().replace_md_bullet_point(
+            "- -5 degrees\n", 0, ["- -5 degrees\n"]
+        )
+        assert is_bullet_point
+        assert "\\item -5 degrees\n" in line
+
+    def test_indented_footnote_definition(self):
+        lines = ["a[^1]\n", "  [^1]: note\n"]
+        line, lines_to_skip = ObsiPdfGenerator.find_replace_footnotes(
+            lines[0], lines, 0
+        )
+        assert line == "a\\footnote[1]{note\n}\n"
+        assert lines_to_skip == [1]
@@ -2,7 +2,11 @@ import os
 import logging
 import pytest
 import shutil
-from obsidian_pdf_gen.generate_pdf.md_notes_pdf import ObsiPdfGenerator
+import pathlib
+from obsidian_pdf_gen.generate_pdf.md_notes_pdf import (
+    ObsiPdfGenerator,
+    _LATEX_AUX_SUFFIXES,
+)
 
 logger = logging.getLogger("ObiPdfGen")
 logger.setLevel(logging.DEBUG)
@@ -163,16 +167,15 @@ class TestPdfGen:
         obsi.generate_pdf(path, clear=False, toc=toc)
 
         # Remove unwated files
-        for file_ext in [".aux", ".log", ".toc", ".out", ".pyg"]:
+        for file_ext in _LATEX_AUX_SUFFIXES:
             current_file = path.replace(".tex", file_ext)
             if os.path.exists(current_file):
                 logger.debug(f"Removing {current_file}")
                 os.remove(current_file)
-        current_folder_files = os.listdir()
-        for file_or_folder in current_folder_files:
-            logger.debug(f"Removing {file_or_folder}")
-            if "_minted-" in file_or_folder:
-                shutil.rmtree(file_or_folder)
+        minted_dir = f"_minted-{pathlib.Path(path).stem}"
+        if os.path.isdir(minted_dir):
+            logger.debug(f"Removing {minted_dir}")
+            shutil.rmtree(minted_dir)
 
         # Check that path exists
         assert os.path.exists(path.replace(".tex", ".pdf"))